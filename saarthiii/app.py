@@ -1,48 +1,636 @@
+import functools
+import glob
+import logging
+import os
+import platform
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import torch
+
+# Pin torch's CPU thread pools before anything creates a tensor. Streamlit re-runs this
+# script on every interaction, and inter-op threads can only be set once per process.
+torch.set_num_threads(min(8, os.cpu_count() or 4))
+if torch.get_num_interop_threads() != 1:
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:
+    onnxruntime = None
+
+try:
+    from optimum.bettertransformer import BetterTransformer
+except ImportError:
+    BetterTransformer = None
+
+logger = logging.getLogger(__name__)
 
 # ==============================
 # ✅ PAGE CONFIG
 # ==============================
 st.set_page_config(page_title="Saarthi Inclusive Job Recommender", page_icon="🧭", layout="wide")
 
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DATA_PATH = r"C:/Users/suraj/Desktop/saarthiii/data/combined_dataset.csv"
+EMBEDDINGS_PATH = r"C:/Users/suraj/Desktop/saarthiii/models/job_embeddings.npy"
+
+# Artifacts derived from the files above; point SAARTHI_CACHE_DIR at a tmpfs mount
+# (e.g. /dev/shm/saarthi) so restarts memory-map them from RAM instead of disk
+CACHE_DIR = os.environ.get("SAARTHI_CACHE_DIR", r"C:/Users/suraj/Desktop/saarthiii/models")
+# "{}" is a fingerprint of the source file, so a regenerated source is never served from an older build
+EMBEDDINGS_INT8_PATH = os.path.join(CACHE_DIR, "job_embeddings.l2.{}.int8.npy")
+EMBEDDINGS_SCALE_PATH = os.path.join(CACHE_DIR, "job_embeddings.l2.{}.scale.npy")
+FAISS_INDEX_PATH = os.path.join(CACHE_DIR, "job_faiss.{}.index")
+ENCODED_EMBEDDINGS_PATH = os.path.join(CACHE_DIR, "job_embeddings.encoded.{}.npy")  # keyed by the CSV
+ONNX_MODEL_DIR = os.path.join(CACHE_DIR, "onnx-minilm")
+ONNX_MODEL_FILE = "model_quantized.onnx"
+ONNX_MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's max_seq_length
+QUERY_MAX_TOKENS = 64  # skill lists are short; longer input is truncated before the forward pass
+
+# IVF256 needs roughly 39 training points per list; smaller corpora use an exact IndexFlatIP
+FAISS_INDEX_SPEC = "OPQ16,IVF256,PQ16"
+FAISS_MIN_TRAIN_ROWS = 256 * 39
+FAISS_NPROBE = 8
+
+CORPUS_ENCODE_BATCH = 64
+QUANTIZE_CHUNK_ROWS = 8192
+SCORE_BLOCK_ROWS = 4096  # int8 rows dequantized per GEMV (~6 MB of float32 at d=384)
+
+# Columns shown in the results table, in display order
+RESULT_COLUMNS = ["job_title", "company_name", "category", "similarity_score", "suitable_for_disability"]
+
+DISABILITY_TYPES = ["visual_impairment", "hearing_impairment", "speech_impairment", "mobility_impairment"]
+
+ENCODE_CACHE_SIZE = 4096
+ENCODE_MAX_BATCH = 32
+# Seconds to wait for more queries before encoding. Batching pays off far more on a GPU,
+# where batch 16 costs little more than batch 1; on CPU a short wait keeps latency low.
+ENCODE_BATCH_WINDOW_GPU = 0.02
+ENCODE_BATCH_WINDOW_CPU = 0.005
+
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL = 3600  # seconds
+
+# ==============================
+# ✅ ENCODERS
+# ==============================
+def mean_pool(hidden, attention_mask, normalize):
+    # Mean pooling over real tokens, matching the SentenceTransformer pipeline
+    mask = attention_mask[..., None].astype(np.float32)
+    pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+    if normalize:
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+    return pooled.astype(np.float32)
+
+class OnnxEncoder:
+    """SentenceTransformer-style encode() backed by an INT8 ONNX Runtime session."""
+
+    def __init__(self, model_dir):
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=ONNX_MODEL_FILE, session_options=options
+        )
+
+    def encode(
+        self, sentences, batch_size=32, normalize_embeddings=False, convert_to_numpy=True,
+        max_length=ONNX_MAX_SEQ_LENGTH, **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            tokens = self.tokenizer(
+                sentences[start:start + batch_size], padding=True, truncation=True,
+                max_length=max_length, return_tensors="np",
+            )
+            hidden = self.model(**tokens).last_hidden_state
+            batches.append(mean_pool(hidden, tokens["attention_mask"], normalize_embeddings))
+
+        embeddings = np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+class QueryEncoder:
+    """Encodes user queries with an LRU cache, coalescing concurrent misses into one batch."""
+
+    def __init__(self, model, batch_window):
+        self.model = model
+        self.batch_window = batch_window
+        self.forward = None if isinstance(model, OnnxEncoder) else model[0].auto_model
+        # On CUDA only this query forward pass is compiled, at the one fixed
+        # [ENCODE_MAX_BATCH, QUERY_MAX_TOKENS] shape, so a single CUDA graph is replayed per batch
+        self.compiled = self.forward is not None and model.device.type == "cuda" and hasattr(torch, "compile")
+        if self.compiled:
+            self.forward = torch.compile(self.forward, mode="reduce-overhead", dynamic=False)
+        self.requests = queue.Queue()
+        self.encode = functools.lru_cache(maxsize=ENCODE_CACHE_SIZE)(self._encode)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _encode(self, text):
+        future = Future()
+        self.requests.put((text, future))
+        return future.result()
+
+    def _encode_batch(self, texts):
+        # Truncating to QUERY_MAX_TOKENS keeps long pasted text from running a full-length pass
+        if isinstance(self.model, OnnxEncoder):
+            return self.model.encode(
+                texts, batch_size=ENCODE_MAX_BATCH, normalize_embeddings=True, max_length=QUERY_MAX_TOKENS
+            )
+
+        # Call the fast tokenizer and HF transformer directly, skipping SentenceTransformer.encode's
+        # per-call sorting, batching and device bookkeeping for what is at most one small batch
+        transformer = self.model[0]
+        n_texts = len(texts)
+        if self.compiled:
+            # Pad batch and sequence to the captured shape so the CUDA graph is replayed, not re-recorded
+            texts = list(texts) + [""] * (ENCODE_MAX_BATCH - n_texts)
+        tokens = transformer.tokenizer(
+            texts, padding="max_length" if self.compiled else True, truncation=True,
+            max_length=QUERY_MAX_TOKENS, return_tensors="pt",
+        ).to(self.model.device)
+        with torch.inference_mode():
+            hidden = self.forward(**tokens).last_hidden_state[:n_texts]
+        attention_mask = tokens["attention_mask"][:n_texts]
+        return mean_pool(hidden.float().cpu().numpy(), attention_mask.cpu().numpy(), normalize=True)
+
+    def _warm_up(self):
+        # Inductor's CUDA-graph trees are per thread, so compile and record on this worker thread:
+        # the first call compiles, the second records the graph that later batches replay
+        try:
+            for _ in range(2):
+                self._encode_batch(["warmup"])
+        except Exception:
+            logger.exception("torch.compile warm-up failed; encoding queries eagerly")
+            self.forward = self.model[0].auto_model
+            self.compiled = False
+
+    def _run(self):
+        if self.compiled:
+            self._warm_up()
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < ENCODE_MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self._encode_batch(texts)
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                # Back to float32 for the BLAS/FAISS paths; cached vectors are shared, so read-only
+                vector = vector.astype(np.float32)
+                vector.setflags(write=False)
+                future.set_result(vector)
+
 # ==============================
 # ✅ LOAD DATA AND MODEL
 # ==============================
+def onnx_quantization_config():
+    # Without VNNI, ONNX Runtime's U8S8 kernels can saturate unless weights use a reduced range,
+    # so only VNNI hosts get the full-range config (e.g. AVX2-only cloud CPUs get reduce_range)
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=True)
+    try:
+        with open("/proc/cpuinfo") as f:
+            has_vnni = "avx512_vnni" in f.read()
+    except OSError:
+        has_vnni = False
+    if has_vnni:
+        return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=True, reduce_range=True)
+
+def load_onnx_encoder():
+    # Exports and dynamically quantizes the encoder once; None keeps the PyTorch model
+    if onnxruntime is None:
+        return None
+    try:
+        if not os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+            os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+            ORTModelForFeatureExtraction.from_pretrained(MODEL_NAME, export=True).save_pretrained(ONNX_MODEL_DIR)
+            AutoTokenizer.from_pretrained(MODEL_NAME).save_pretrained(ONNX_MODEL_DIR)
+            ORTQuantizer.from_pretrained(ONNX_MODEL_DIR).quantize(
+                save_dir=ONNX_MODEL_DIR, quantization_config=onnx_quantization_config()
+            )
+        return OnnxEncoder(ONNX_MODEL_DIR)
+    except Exception:
+        logger.exception("INT8 ONNX encoder unavailable; falling back to the PyTorch model")
+        return None
+
+def fuse_attention(model):
+    # Fused attention kernels; the query forward pass is compiled separately by QueryEncoder
+    transformer = model[0]
+    if BetterTransformer is not None:
+        try:
+            transformer.auto_model = BetterTransformer.transform(transformer.auto_model, keep_original_model=False)
+        except Exception:
+            pass  # newer transformers already route BERT attention through SDPA
+    return model
+
+def pick_device():
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+@st.cache_resource
+def get_model():
+    device = pick_device()
+
+    # On CPU the INT8 ONNX Runtime graph beats PyTorch eager; GPUs keep the torch model
+    model = load_onnx_encoder() if device == "cpu" else None
+    if model is None:
+        model = SentenceTransformer(MODEL_NAME, device=device)
+        if device == "cuda":
+            # Half precision halves memory traffic; cosine ranking is unaffected at this precision
+            model = fuse_attention(model.half())
+
+    # A dummy encode pays the host->device transfer and kernel init before the first user does
+    with torch.inference_mode():
+        model.encode("warmup", convert_to_numpy=True)
+    if device == "cuda":
+        torch.cuda.synchronize()
+    return model
+
+@st.cache_resource
+def load_jobs():
+    return pd.read_csv(DATA_PATH)
+
+@st.cache_resource
+def load_job_columns(_df):
+    # Read-only column arrays for the result table, so queries never index through pandas
+    return {
+        column: _df[column].to_numpy(copy=True)
+        for column in RESULT_COLUMNS if column != "similarity_score"
+    }
+
+def file_fingerprint(path):
+    # Size and mtime change whenever the file is rewritten, even at the same row count
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+def remove_stale_builds(path_pattern, fingerprint):
+    # Drops artifacts built from older sources, so a tmpfs cache doesn't fill up with them
+    current = path_pattern.format(fingerprint)
+    for path in glob.glob(path_pattern.format("*")):
+        if path != current:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@st.cache_resource
+def get_job_embeddings(_df):
+    # The notebook's matrix, memory-mapped, whenever it has one row per job; returns the matrix
+    # and the fingerprint of the file behind it
+    if os.path.exists(EMBEDDINGS_PATH):
+        embeddings = np.load(EMBEDDINGS_PATH, mmap_mode="r")
+        if len(embeddings) == len(_df):
+            # mtimes are only a hint (copies and syncs reorder them), so a newer CSV just gets a warning
+            if os.path.getmtime(DATA_PATH) > os.path.getmtime(EMBEDDINGS_PATH):
+                logger.warning("%s is newer than %s; re-run the notebook if job texts changed", DATA_PATH, EMBEDDINGS_PATH)
+            return embeddings, file_fingerprint(EMBEDDINGS_PATH)
+        del embeddings
+
+    # Otherwise re-encode into the cache, leaving the notebook's file untouched
+    fingerprint = file_fingerprint(DATA_PATH)
+    path = ENCODED_EMBEDDINGS_PATH.format(fingerprint)
+    if not os.path.exists(path):
+        logger.warning("%s is missing or stale; re-encoding %d jobs into %s", EMBEDDINGS_PATH, len(_df), path)
+        # Full-precision SentenceTransformer as in the notebook, not the INT8/FP16 query encoder
+        encoder = SentenceTransformer(MODEL_NAME, device=pick_device())
+        embeddings = encoder.encode(
+            _df["text"].fillna("").tolist(),
+            batch_size=CORPUS_ENCODE_BATCH, normalize_embeddings=True, convert_to_numpy=True,
+        )
+        del encoder
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, embeddings.astype(np.float32))
+        os.replace(path + ".tmp", path)
+        remove_stale_builds(ENCODED_EMBEDDINGS_PATH, fingerprint)
+    return np.load(path, mmap_mode="r"), file_fingerprint(path)
+
+@st.cache_resource
+def load_quantized_embeddings(_embeddings, fingerprint):
+    # L2-normalized rows as int8 codes with a per-row scale (~4x smaller than float32),
+    # built once per source fingerprint then memory-mapped; cosine similarity becomes codes @ q * scale
+    codes_path = EMBEDDINGS_INT8_PATH.format(fingerprint)
+    scales_path = EMBEDDINGS_SCALE_PATH.format(fingerprint)
+    if not (os.path.exists(codes_path) and os.path.exists(scales_path)):
+        # Built under temp names and renamed once complete, so a build that dies
+        # halfway never leaves files that pass for a finished one
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        codes = np.lib.format.open_memmap(codes_path + ".tmp", mode="w+", dtype=np.int8, shape=_embeddings.shape)
+        scales = np.empty(len(_embeddings), dtype=np.float32)
+        for start in range(0, len(_embeddings), QUANTIZE_CHUNK_ROWS):
+            block = np.asarray(_embeddings[start:start + QUANTIZE_CHUNK_ROWS], dtype=np.float32)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            block = block / norms
+            block_scales = np.abs(block).max(axis=1) / 127
+            block_scales[block_scales == 0] = 1.0
+            codes[start:start + len(block)] = np.round(block / block_scales[:, None]).astype(np.int8)
+            scales[start:start + len(block)] = block_scales
+        codes.flush()
+        del codes
+        with open(scales_path + ".tmp", "wb") as f:
+            np.save(f, scales)
+        os.replace(codes_path + ".tmp", codes_path)
+        os.replace(scales_path + ".tmp", scales_path)
+        remove_stale_builds(EMBEDDINGS_INT8_PATH, fingerprint)
+        remove_stale_builds(EMBEDDINGS_SCALE_PATH, fingerprint)
+
+    codes = np.load(codes_path, mmap_mode="r")
+    scales = np.load(scales_path, mmap_mode="r")
+    return np.asarray(codes), np.asarray(scales)
+
+def normalized_float32(embeddings):
+    vectors = np.ascontiguousarray(embeddings, dtype=np.float32).copy()
+    faiss.normalize_L2(vectors)
+    return vectors
+
+@st.cache_resource
+def load_job_index(_embeddings, fingerprint):
+    # Returns None when FAISS is unavailable so recommend_jobs keeps the exact scan
+    if faiss is None:
+        return None
+    try:
+        if len(_embeddings) < FAISS_MIN_TRAIN_ROWS:
+            # Too small to train IVF: exact inner-product search on FAISS's SIMD kernels
+            vectors = normalized_float32(_embeddings)
+            index = faiss.IndexFlatIP(vectors.shape[1])
+            index.add(vectors)
+            return index
+
+        # Persisted per source fingerprint, like the int8 store, so new content is re-indexed
+        index_path = FAISS_INDEX_PATH.format(fingerprint)
+        index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+        if index is None or index.ntotal != len(_embeddings):
+            vectors = normalized_float32(_embeddings)
+            index = faiss.index_factory(vectors.shape[1], FAISS_INDEX_SPEC, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.add(vectors)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            faiss.write_index(index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+            remove_stale_builds(FAISS_INDEX_PATH, fingerprint)
+        faiss.extract_index_ivf(index).nprobe = FAISS_NPROBE
+        return index
+    except Exception:
+        logger.exception("FAISS index unavailable; falling back to the exact scan")
+        return None
+
+@st.cache_resource
+def load_disability_masks(_df):
+    # "a|b" tag lists -> {tag: boolean row mask}, built once instead of a regex scan per query
+    tags = (
+        _df["suitable_for_disability"].fillna("").str.lower()
+        .str.replace(r"[,;]", "|", regex=True).str.split("|")
+        .reset_index(drop=True).explode().str.strip()
+    )
+    tags = tags[tags != ""]
+    masks = {"none": np.ones(len(_df), dtype=np.bool_)}
+    for tag, rows in tags.groupby(tags).groups.items():
+        masks[tag] = np.zeros(len(_df), dtype=np.bool_)
+        masks[tag][rows] = True
+    for mask in masks.values():
+        mask.setflags(write=False)
+    return masks
+
+@st.cache_resource
+def load_disability_rows(_masks):
+    return {tag: np.flatnonzero(mask) for tag, mask in _masks.items() if tag != "none"}
+
+@st.cache_resource
+def load_disability_search_params(_masks, _index):
+    # Per-tag FAISS bitmap selectors, so the index scan only scores eligible rows
+    if _index is None:
+        return {}
+    is_ivf = faiss.try_extract_index_ivf(_index) is not None
+    search_params = {}
+    for tag, mask in _masks.items():
+        if tag == "none":
+            continue
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        if is_ivf:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=FAISS_NPROBE)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        # SWIG does not keep the selector or its bitmap alive on our behalf
+        params.referenced_objects = [selector, bitmap]
+        search_params[tag] = params
+    return search_params
+
+@st.cache_resource
+def load_query_encoder(_model):
+    batch_window = ENCODE_BATCH_WINDOW_GPU if torch.cuda.is_available() else ENCODE_BATCH_WINDOW_CPU
+    return QueryEncoder(_model, batch_window)
+
+@st.cache_resource
+def load_topk_kernel():
+    # Compiled once per process; None means recommend_jobs keeps the NumPy scan
+    if numba is None:
+        return None
+
+    @numba.njit(parallel=True, fastmath=True)
+    def topk_cosine(q, codes, scales, allowed, k):
+        n_chunks = numba.get_num_threads()
+        chunk = (codes.shape[0] + n_chunks - 1) // n_chunks
+        # A finite sentinel below any cosine: fastmath assumes no infinities
+        best_scores = np.full((n_chunks, k), -2.0, dtype=np.float32)
+        best_ids = np.full((n_chunks, k), -1, dtype=np.int64)
+
+        # Each thread keeps a sorted top-k for its own slice of rows
+        for c in numba.prange(n_chunks):
+            for i in range(c * chunk, min(codes.shape[0], (c + 1) * chunk)):
+                if not allowed[i]:
+                    continue
+                s = np.float32(0.0)
+                for j in range(codes.shape[1]):
+                    s += np.float32(codes[i, j]) * q[j]
+                s *= scales[i]
+                if s <= best_scores[c, k - 1]:
+                    continue
+                pos = k - 1
+                while pos > 0 and best_scores[c, pos - 1] < s:
+                    best_scores[c, pos] = best_scores[c, pos - 1]
+                    best_ids[c, pos] = best_ids[c, pos - 1]
+                    pos -= 1
+                best_scores[c, pos] = s
+                best_ids[c, pos] = i
+
+        return best_scores.ravel(), best_ids.ravel()
+
+    # Each Streamlit session runs the script in its own thread, and Numba's workqueue layer
+    # (the fallback without TBB or OpenMP) aborts the process on concurrent parallel launches
+    lock = threading.Lock()
+
+    def locked_topk_cosine(*args):
+        with lock:
+            return topk_cosine(*args)
+
+    return locked_topk_cosine
+
 @st.cache_resource
-def load_model_and_data():
-    model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-    df = pd.read_csv(r"C:/Users/suraj/Desktop/saarthiii/data/combined_dataset.csv")
-    embeddings = np.load(r"C:/Users/suraj/Desktop/saarthiii/models/job_embeddings.npy")
-    return model, df, embeddings
+def warm_up_query_path(_query_encoder, _topk_kernel, _codes, _scales, _all_rows):
+    # Waits out the encoder worker's own warm-up (and CUDA-graph capture) and JIT-compiles the kernel
+    # for the exact argument types recommend_jobs uses, so neither cost lands on the first "Find Jobs" click
+    query = _query_encoder.encode("warmup")
+    if _topk_kernel is not None:
+        _topk_kernel(query, _codes[:1], _scales[:1], _all_rows[:1], 1)
+    return True
 
-model, df, job_embeddings = load_model_and_data()
+model = get_model()
+df = load_jobs()
+job_columns = load_job_columns(df)
+job_embeddings, embeddings_fingerprint = get_job_embeddings(df)
+job_codes, job_scales = load_quantized_embeddings(job_embeddings, embeddings_fingerprint)
+job_index = load_job_index(job_embeddings, embeddings_fingerprint)
+# IVF-PQ scores are PQ approximations; the flat index scores exactly
+job_index_is_approximate = job_index is not None and faiss.try_extract_index_ivf(job_index) is not None
+disability_masks = load_disability_masks(df)
+disability_rows = load_disability_rows(disability_masks)
+disability_search_params = load_disability_search_params(disability_masks, job_index)
+query_encoder = load_query_encoder(model)
+topk_kernel = load_topk_kernel()
+warm_up_query_path(query_encoder, topk_kernel, job_codes, job_scales, disability_masks["none"])
 st.sidebar.success("✅ Model & dataset loaded successfully!")
 
 # ==============================
 # ✅ HELPER FUNCTION
 # ==============================
+def disability_mask(disability_type):
+    # rank_jobs has already returned for tags no job carries
+    return disability_masks[(disability_type or "none").lower()]
+
+def disability_row_ids(disability_type):
+    tag = (disability_type or "none").lower()
+    if tag == "none":
+        return None
+    return disability_rows.get(tag, np.empty(0, dtype=np.intp))
+
+def build_results(rows, scores):
+    # Only the displayed columns of the winning rows, as one small Arrow table for st.dataframe;
+    # every ranking path already yields float32 scores, so the cast is a no-op guard
+    scores = scores.astype(np.float32, copy=False)
+    columns = {}
+    for column in RESULT_COLUMNS:
+        values = scores if column == "similarity_score" else job_columns[column][rows]
+        columns[column] = pa.array(values, from_pandas=True)
+    return pa.table(columns)
+
+def top_k_indices(scores, k):
+    # O(N) selection of the k best scores, then a sort of just those k
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+def cosine_scores(query, row_ids=None):
+    # Scores every row, or only row_ids; ineligible rows are never dequantized or multiplied
+    n_rows = len(job_codes) if row_ids is None else len(row_ids)
+    scores = np.empty(n_rows, dtype=np.float32)
+    # Dequantize a block at a time so each step is one float32 BLAS GEMV over a small tile;
+    # BLAS threads the GEMV itself, so no extra thread pool is layered on top
+    for block_start in range(0, n_rows, SCORE_BLOCK_ROWS):
+        block_stop = min(block_start + SCORE_BLOCK_ROWS, n_rows)
+        rows = slice(block_start, block_stop) if row_ids is None else row_ids[block_start:block_stop]
+        out = scores[block_start:block_stop]
+        np.matmul(job_codes[rows].astype(np.float32), query, out=out)
+        out *= job_scales[rows]
+    return scores
+
 def recommend_jobs(user_input, disability_type=None, top_n=5):
-    # Encode user input
-    user_embedding = model.encode([user_input], convert_to_tensor=False)
-    user_embedding = np.array(user_embedding).reshape(1, -1)
+    # Case and spacing don't change the (uncased) embedding, so they share cache entries
+    return rank_jobs(" ".join(user_input.lower().split()), disability_type, top_n)
 
-    # Compute cosine similarity
-    similarity_scores = cosine_similarity(user_embedding, job_embeddings)[0]
-    df["similarity_score"] = similarity_scores
+@st.cache_data(max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, show_spinner=False)
+def rank_jobs(query, disability_type, top_n):
+    # No job carries this tag: nothing to encode, search or scan
+    tag = (disability_type or "none").lower()
+    if tag not in disability_masks:
+        return build_results(np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32))
 
-    # Optional: filter for disability-friendly jobs
-    if disability_type and disability_type.lower() != "none":
-        df_filtered = df[df["suitable_for_disability"].str.contains(disability_type, case=False, na=False)]
-    else:
-        df_filtered = df.copy()
+    # Encode user input (normalized, so cosine similarity is a dot product); the encoder
+    # keeps its own cache, so changing only top_n or disability_type skips the model
+    user_embedding = query_encoder.encode(query).reshape(1, -1)
 
-    # Sort by similarity score
-    recommendations = df_filtered.sort_values(by="similarity_score", ascending=False).head(top_n)
-    return recommendations
+    # FAISS search (IVF-PQ or exact flat), with the disability filter applied inside the index scan
+    if job_index is not None:
+        params = disability_search_params.get(tag)
+        scores, ids = job_index.search(user_embedding, top_n, params=params)
+        # Too few eligible rows in the probed lists: fall through to the exact scan
+        if (ids[0] >= 0).all():
+            if job_index_is_approximate:
+                # Re-score the winners against the int8 store so the displayed scores are true cosines
+                scores = cosine_scores(user_embedding[0], ids[0])
+                order = np.argsort(-scores)
+                return build_results(ids[0][order], scores[order])
+            return build_results(ids[0], scores[0])
+
+    # Fused JIT scan: cosine, disability filter and per-thread top-k in one pass
+    if topk_kernel is not None:
+        scores, ids = topk_kernel(
+            user_embedding[0], job_codes, job_scales, disability_mask(disability_type), top_n
+        )
+        found = ids >= 0
+        scores, ids = scores[found], ids[found]
+        top_idx = top_k_indices(scores, top_n)
+        return build_results(ids[top_idx], scores[top_idx])
+
+    # Optional: filter for disability-friendly jobs before scoring (None = every row)
+    candidate_ids = disability_row_ids(disability_type)
+
+    # Compute cosine similarity: corpus rows and query are both unit length
+    candidate_scores = cosine_scores(user_embedding[0], candidate_ids)
+
+    # Select the top_n scores without sorting the whole corpus
+    top_idx = top_k_indices(candidate_scores, top_n)
+    rows = top_idx if candidate_ids is None else candidate_ids[top_idx]
+    return build_results(rows, candidate_scores[top_idx])
 
 # ==============================
 # ✅ STREAMLIT FRONTEND
@@ -54,24 +642,26 @@ with st.form("job_form"):
     user_input = st.text_area("💼 Enter your skills or job interests:", "Python, SQL, Excel, Data Analysis")
     disability_type = st.selectbox(
         "♿ Select your disability type:",
-        ["none", "visual_impairment", "hearing_impairment", "speech_impairment", "mobility_impairment"]
+        ["none"] + DISABILITY_TYPES
     )
     top_n = st.slider("🔢 Number of job recommendations:", 3, 15, 5)
     submitted = st.form_submit_button("Find Jobs")
 
-if submitted:
+if submitted and not user_input.strip():
+    # Nothing to match against: skip the encode and corpus scan entirely
+    st.warning("⚠️ Please enter at least one skill or job interest.")
+elif submitted:
     with st.spinner("🔍 Finding best matching jobs..."):
         recommendations = recommend_jobs(user_input, disability_type, top_n)
     
     st.success(f"✅ Found {len(recommendations)} recommended jobs for your profile!")
 
-    st.dataframe(
-        recommendations[["job_title", "company_name", "category", "similarity_score", "suitable_for_disability"]]
-    )
+    st.dataframe(recommendations)
 
-    # Show average similarity score
-    avg_score = recommendations["similarity_score"].mean()
-    st.metric("Average Similarity Score", f"{avg_score:.2f}")
+    # Show average similarity score (no metric for an empty result, e.g. a tag no job carries)
+    if len(recommendations):
+        avg_score = float(recommendations["similarity_score"].to_numpy().mean())
+        st.metric("Average Similarity Score", f"{avg_score:.2f}")
 
 # ==============================
 # ✅ FOOTER